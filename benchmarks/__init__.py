@@ -0,0 +1,6 @@
+# 使い方（リポジトリのルートで実行）:
+#   python -m benchmarks run -o benchmarks/baseline.json     基準値を保存
+#   python -m benchmarks run --compare benchmarks/baseline.json
+#   python -m benchmarks compare benchmarks/baseline.json benchmarks/results/latest.json
+#   python -m benchmarks startup                             起動から最初のフレームまでの時間とimportの内訳
+# flet と requests は benchmarks/fakes.py の偽物に差し替えて計測する。
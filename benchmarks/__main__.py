@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+
+from benchmarks import runner, startup
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="電卓・天気アプリ・最終課題のベンチマーク")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="ベンチマークを実行してJSONに保存する")
+    run_parser.add_argument("-o", "--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    run_parser.add_argument("-k", "--select", action="append", help="名前に含まれる文字列で絞り込む（複数指定可）")
+    run_parser.add_argument("--repeat", type=int, default=runner.DEFAULT_REPEAT, help="1項目あたりのサンプル数")
+    run_parser.add_argument("--processes", type=int, default=runner.DEFAULT_PROCESSES,
+                            help="サンプルを分けて取るプロセスの数")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="実行後に基準値と比較する")
+    run_parser.add_argument("--threshold", type=float, default=runner.DEFAULT_THRESHOLD)
+
+    compare_parser = sub.add_parser("compare", help="2つの結果を比較し、劣化があれば終了コード1、比較できなければ2を返す")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", default=os.path.join(RESULTS_DIR, "latest.json"))
+    compare_parser.add_argument("--threshold", type=float, default=runner.DEFAULT_THRESHOLD)
+
+    startup_parser = sub.add_parser("startup", help="各アプリの起動時間と重いimportを表示する")
+    startup_parser.add_argument("--repeat", type=int, default=runner.DEFAULT_REPEAT)
+    startup_parser.add_argument("--latency", type=float, default=startup.DEFAULT_LATENCY,
+                                help="偽のネットワークの応答時間（秒）")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        results, last_runs = startup.measure(list(startup.APPS), args.repeat, args.latency)
+        for app, last in last_runs.items():
+            print(f"{app} (flet: {last['flet']}, 通信回数: {last['network_calls']})")
+            for metric in ("import", "first_frame", "ready"):
+                r = results[f"startup.{app}.{metric}"]
+                print(f"  {metric:<12} {r['median'] * 1000:10.1f} ms")
+            print("  重いimport（累積）:")
+            startup.print_top_imports(last["importtime"])
+        return 0
+
+    if args.command == "run":
+        report = runner.run_all(args.select, args.repeat, args.processes)
+        runner.save(report, args.output)
+        print(f"結果を保存しました: {args.output}")
+        if not args.compare:
+            return 0
+        baseline = runner.load(args.compare)
+        current = report
+    else:
+        baseline = runner.load(args.baseline)
+        current = runner.load(args.current)
+
+    reason = runner.incompatible_reason(baseline, current)
+    if reason:
+        print(f"\n{reason}")
+        return 2
+
+    print()
+    regressions = runner.compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)}件の劣化を検出しました（しきい値 {args.threshold * 100:.0f}%）: {', '.join(regressions)}")
+        return 1
+    print("\n劣化はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import types
+
+from benchmarks import fakes
+
+# 名前 -> {"setup": 計測対象の関数を返す関数}。1回の計測で呼ぶ回数は runner.autorange で決める
+CASES = {}
+
+
+def case(name):
+    def decorator(setup):
+        CASES[name] = {"name": name, "setup": setup}
+        return setup
+    return decorator
+
+
+def _load(relative_path, module_name):
+    fakes.install()
+    return fakes.load_app(relative_path, module_name)
+
+
+# ---- calculator ----
+
+CALC_SEQUENCE = [
+    "1", "2", "3", "+", "4", "5", "6", "*", "7", "=",
+    "+/-", "+/-", "%", "AC",
+    "9", "0", "sin", "cos", "tan", "AC",
+    "1", "0", "0", "log", "√", "x^2", "e^x", "π",
+    "8", "/", "0", "=", "AC",
+]
+
+
+@case("calculator.evaluate")
+def calculator_evaluate():
+    calc_main = _load(os.path.join("calculator", "main.py"), "bench_calculator_main")
+    app = calc_main.CalculatorApp()
+    events = [types.SimpleNamespace(control=types.SimpleNamespace(data=d)) for d in CALC_SEQUENCE]
+
+    def run():
+        for e in events:
+            app.button_clicked(e)
+    return run
+
+
+# ---- 天気データ ----
+
+@case("weather.parse_forecasts")
+def weather_parse_forecasts():
+    # 受信したJSON文字列からカード/DBの行になるまで（json.loads + timeSeriesの走査）
+    app = _load(os.path.join("jma", "main.py"), "bench_jma_main")
+    payload = fakes.forecast_payload()
+    return lambda: app.parse_forecasts(json.loads(payload))
+
+
+@case("jmaDB.store_weather_data_in_db")
+def jmadb_store_weather():
+    app = _load(os.path.join("jmaDB", "main.py"), "bench_jmaDB_main")
+    app.init_db()
+    weather_data = json.loads(fakes.forecast_payload())
+    return lambda: app.store_weather_data_in_db("130000", weather_data)
+
+
+@case("jmaDB.get_forecasts_from_db")
+def jmadb_get_forecasts():
+    app = _load(os.path.join("jmaDB", "main.py"), "bench_jmaDB_main")
+    app.init_db()
+    app.store_region_data_in_db(sys.modules["requests"].get("/area.json").json())
+    app.store_weather_data_in_db("130000", json.loads(fakes.forecast_payload()))
+    return lambda: app.get_forecasts_from_db("130000")
+
+
+@case("jmaDB.store_region_data_in_db")
+def jmadb_store_regions():
+    # 2回目以降は差分がないため、比較だけで書き込みは発生しない
+    app = _load(os.path.join("jmaDB", "main.py"), "bench_jmaDB_main")
+    app.init_db()
+    region_data = sys.modules["requests"].get("/area.json").json()
+    return lambda: app.store_region_data_in_db(region_data)
+
+
+@case("jmaDB.get_sidebar_from_db")
+def jmadb_get_sidebar():
+    app = _load(os.path.join("jmaDB", "main.py"), "bench_jmaDB_main")
+    app.init_db()
+    app.store_region_data_in_db(sys.modules["requests"].get("/area.json").json())
+    return app.get_sidebar_from_db
+
+
+# ---- サイドバー構築（main() 全体を偽のPageで実行する。jmaDBは2回目以降DBから作る） ----
+
+@case("jma.main_sidebar")
+def jma_main_sidebar():
+    app = _load(os.path.join("jma", "main.py"), "bench_jma_main")
+    return lambda: app.main(fakes.Page())
+
+
+@case("jmaDB.main_sidebar")
+def jmadb_main_sidebar():
+    app = _load(os.path.join("jmaDB", "main.py"), "bench_jmaDB_main")
+    return lambda: app.main(fakes.Page())
+
+
+# ---- 最終課題のflight_data.db ----
+
+def _flight_rows(count):
+    luggage = [{"Airlines": f"Air Line {i}", "Lost_luggage": f"{(i * 7919) % 90000 + 100:,}"}
+               for i in range(count)]
+    oag = [{"Airlines": f"AIR LINE {i}", "OTP": f"{60 + i % 35}.25%", "Canceled_flights": "0.1%",
+            "Total_flights": f"{1000 + i * 37:,}"}
+           for i in range(count // 2, count + count // 2)]
+    return luggage, oag
+
+
+@case("flight_db.ingest_normalize")
+def flight_db_ingest():
+    sys.path.insert(0, os.path.join(fakes.REPO_ROOT, "最終課題"))
+    from db_handler import DBHandler
+    luggage, oag = _flight_rows(500)
+
+    def run():
+        if os.path.exists("bench_flight.db"):
+            os.remove("bench_flight.db")
+        db = DBHandler("bench_flight.db")
+        db.insert_luggagelosers(luggage)
+        db.insert_oag(oag)
+        for table_name in ("luggagelosers", "oag"):
+            db.normalize_airlines(table_name)
+            db.remove_duplicates(table_name)
+        common_airlines = set(row[0] for row in db.query_joined_data())
+        db.delete_unmatched_airlines("luggagelosers", common_airlines)
+        db.delete_unmatched_airlines("oag", common_airlines)
+        return db.query_joined_data()
+    return run
@@ -0,0 +1,177 @@
+import importlib.util
+import json
+import os
+import sys
+import time
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AREAS_JSON = os.path.join(REPO_ROOT, "jma", "areas.json")
+
+# ---- flet の代替 ----
+
+ENUM_NAMES = {
+    "colors", "Colors", "icons", "Icons",
+    "MainAxisAlignment", "CrossAxisAlignment", "ThemeMode", "ScrollMode",
+    "FontWeight", "TextAlign",
+}
+FACTORY_NAMES = {"margin", "padding", "border_radius", "border", "alignment"}
+
+
+class Control:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.controls = list(args[0]) if args and isinstance(args[0], list) else []
+        self.__dict__.update(kwargs)
+
+    def update(self):
+        pass
+
+
+class Page(Control):
+    def __init__(self):
+        super().__init__()
+        self.updates = 0
+        self.first_add_at = None
+
+    def add(self, *controls):
+        # 最初に画面へ追加された時刻を「最初のフレーム」とみなす
+        if self.first_add_at is None:
+            self.first_add_at = time.perf_counter()
+        self.controls.extend(controls)
+        self.update()
+
+    def update(self):
+        self.updates += 1
+
+
+class _Constants:
+    def __init__(self, prefix):
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return f"{self._prefix}.{name}"
+
+
+class _Factory:
+    def __init__(self, prefix):
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: (self._prefix, name, args, kwargs)
+
+
+def make_flet():
+    module = types.ModuleType("flet")
+    module.Page = Page
+    module.app = lambda *args, **kwargs: None
+
+    def __getattr__(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name in ENUM_NAMES:
+            value = _Constants(name)
+        elif name in FACTORY_NAMES:
+            value = _Factory(name)
+        elif name[:1].isupper():
+            # 同じ名前には同じクラスを返し、継承やisinstanceが本物と同じように動くようにする
+            value = type(name, (Control,), {})
+        else:
+            raise AttributeError(name)
+        setattr(module, name, value)
+        return value
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+# ---- requests の代替 ----
+
+class HTTPError(Exception):
+    def __init__(self, *args, response=None):
+        super().__init__(*args)
+        self.response = response
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        # 文字列なら本物と同じく呼ばれるたびに解析し、解析済みのデータ（area.json）はそのまま返す
+        if isinstance(self._payload, str):
+            return json.loads(self._payload)
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error", response=self)
+
+
+def forecast_payload(days=7):
+    dates = [f"2025-01-{day:02d}T00:00:00+09:00" for day in range(1, days + 1)]
+    codes = ["100", "101", "200", "203", "300", "400", "999"]
+    return json.dumps([
+        {
+            "publishingOffice": "気象庁",
+            "timeSeries": [
+                {"timeDefines": dates[:3], "areas": [{"area": {"name": "東京地方", "code": "130010"},
+                                                      "weatherCodes": codes[:3]}]},
+            ],
+        },
+        {
+            "publishingOffice": "気象庁",
+            "timeSeries": [
+                {"timeDefines": dates, "areas": [{"area": {"name": "東京都", "code": "130000"},
+                                                  "weatherCodes": [codes[i % len(codes)] for i in range(days)]}]},
+                {"timeDefines": dates, "areas": [{"area": {"name": "東京", "code": "44132"},
+                                                  "tempsMin": [str(i) for i in range(days)],
+                                                  "tempsMax": [str(i + 10) for i in range(days)]}]},
+            ],
+        },
+    ], ensure_ascii=False)
+
+
+def make_requests(latency=0.0):
+    module = types.ModuleType("requests")
+    module.exceptions = types.SimpleNamespace(HTTPError=HTTPError, RequestException=Exception)
+    areas = {}
+    forecast = forecast_payload()
+    module.call_count = 0
+
+    def get(url, headers=None, timeout=None):
+        module.call_count += 1
+        if latency:
+            time.sleep(latency)
+        if url.endswith("/area.json"):
+            # 起動時間の計測に影響しないよう、area.json は最初に要求されたときに読み込む
+            if not areas:
+                with open(AREAS_JSON, encoding="utf-8") as f:
+                    areas.update(json.load(f))
+            return FakeResponse(200, areas)
+        if "/forecast/" in url:
+            return FakeResponse(200, forecast)
+        return FakeResponse(404, None)
+
+    module.get = get
+    return module
+
+
+def install(latency=0.0, flet=True):
+    if flet:
+        sys.modules["flet"] = make_flet()
+    sys.modules["requests"] = make_requests(latency)
+
+
+def load_app(relative_path, module_name):
+    # 各アプリの main.py は同名なので、別名のモジュールとして読み込む
+    path = os.path.join(REPO_ROOT, relative_path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,183 @@
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import startup
+from benchmarks.cases import CASES
+from benchmarks.fakes import REPO_ROOT
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 15
+# サンプルを分けて取るプロセスの数。1つのプロセスが最初から最後まで遅いことがあるため、
+# 複数のプロセスで取って、遅いプロセスのサンプルが最小値を動かさないようにする
+DEFAULT_PROCESSES = 3
+# 1サンプルあたりの計測時間の目安。短すぎるとタイマーや割り込みの揺れがそのまま結果に出る
+SAMPLE_SECONDS = 0.1
+
+
+def _time_loop(fn, number):
+    # timeitと同じく、計測中はGCを止めて呼び出し以外の揺れを減らす
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def autorange(fn, sample_seconds=SAMPLE_SECONDS):
+    # timeit.Timer.autorange と同じように 1, 2, 5, 10, 20, 50, ... 回と増やし、
+    # 1サンプルが sample_seconds 以上かかる回数を選ぶ
+    i = 1
+    while True:
+        for j in (1, 2, 5):
+            number = i * j
+            if _time_loop(fn, number) >= sample_seconds:
+                return number
+        i *= 10
+
+
+def summarize(timings, number, repeat):
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "ops_per_sec": 1 / statistics.median(timings),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+# 子プロセスで実行するコード。作業ディレクトリ内でケースを計測し、生のサンプルをJSONで返す
+WORKER_CODE = """
+import contextlib, json, os, sys
+root, names, repeat, workdir = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+sys.path.insert(0, root)
+from benchmarks import runner
+os.chdir(workdir)
+# アプリ内のprintが計測結果に混ざらないよう捨てる。
+# StringIOに溜めると呼び出し回数に応じてバッファが伸び、後のサンプルほど遅くなる
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    samples = runner.sample_cases(names, repeat)
+print(json.dumps(samples))
+"""
+
+
+def sample_cases(names, repeat):
+    # 全ケースを準備して回数を決めてから、1サンプルずつ順番に回す。
+    # 数秒続く環境の揺れが1つのケースの全サンプルに重なると最小値まで遅くなるため
+    prepared = {}
+    for name in names:
+        fn = CASES[name]["setup"]()
+        fn()  # ウォームアップ
+        prepared[name] = (fn, autorange(fn))
+    timings = {name: [] for name in names}
+    for _ in range(repeat):
+        for name, (fn, number) in prepared.items():
+            timings[name].append(_time_loop(fn, number) / number)
+    return {name: {"number": prepared[name][1], "timings": timings[name]} for name in names}
+
+
+def measure(names, repeat, processes=DEFAULT_PROCESSES):
+    per_process = max(1, -(-repeat // processes))
+    timings = {name: [] for name in names}
+    numbers = {name: [] for name in names}
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("APP_TELEMETRY", None)
+    for _ in range(processes):
+        # weather.db などは作業ディレクトリに作られるため、一時ディレクトリ内で計測する
+        with tempfile.TemporaryDirectory() as workdir:
+            proc = subprocess.run(
+                [sys.executable, "-c", WORKER_CODE, REPO_ROOT, json.dumps(names), str(per_process), workdir],
+                capture_output=True, text=True, env=env, check=True,
+            )
+        samples = json.loads(proc.stdout.strip().splitlines()[-1])
+        for name in names:
+            timings[name].extend(samples[name]["timings"])
+            numbers[name].append(samples[name]["number"])
+    return {name: summarize(timings[name], max(numbers[name]), len(timings[name])) for name in names}
+
+
+def _print_result(name, r):
+    print(f"{name:<36} {r['median'] * 1000:10.3f} ms  (min {r['min'] * 1000:.3f} ms)")
+
+
+def run_all(selected=None, repeat=DEFAULT_REPEAT, processes=DEFAULT_PROCESSES):
+    names = [name for name in CASES if not selected or any(s in name for s in selected)]
+    results = measure(names, repeat, processes) if names else {}
+    for name, r in results.items():
+        _print_result(name, r)
+
+    # 起動時間は別プロセスで -X importtime 付きで計測する
+    apps = [app for app in startup.APPS if not selected or any(s in f"startup.{app}" for s in selected)]
+    if apps:
+        app_results, _ = startup.measure(apps, repeat)
+        for name, r in app_results.items():
+            results[name] = r
+            _print_result(name, r)
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "flet": startup.flet_mode(),
+        },
+        "results": results,
+    }
+
+
+def save(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def incompatible_reason(baseline, current):
+    # 本物のfletと偽物のfletでは起動時間が比較にならないので、計測条件が違えば比較しない
+    base_flet = baseline["meta"].get("flet")
+    current_flet = current["meta"].get("flet")
+    if base_flet != current_flet:
+        return (f"fletの種類が異なるため比較できません（基準値: {base_flet or '不明'} / 今回: {current_flet or '不明'}）。"
+                "同じ環境で基準値を取り直してください")
+    return None
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # 中央値と最小値の両方が基準値の (1 + threshold) 倍を超えたものだけを劣化とみなす。
+    # 最小値は他の処理に割り込まれにくいので、中央値だけが遅くなったものは揺れとして扱う
+    regressions = []
+    base_results = baseline["results"]
+    for name, r in current["results"].items():
+        if name not in base_results:
+            print(f"{name:<36} {'(基準値なし)':>10}")
+            continue
+        ratio = r["median"] / base_results[name]["median"]
+        min_ratio = r["min"] / base_results[name]["min"]
+        mark = ""
+        if ratio > 1 + threshold and min_ratio > 1 + threshold:
+            mark = "  <-- 劣化"
+            regressions.append(name)
+        elif ratio < 1 - threshold and min_ratio < 1 - threshold:
+            mark = "  (改善)"
+        print(f"{name:<36} {base_results[name]['median'] * 1000:10.3f} ms -> "
+              f"{r['median'] * 1000:10.3f} ms  x{ratio:.2f} (min x{min_ratio:.2f}){mark}")
+    for name in base_results:
+        if name not in current["results"]:
+            print(f"{name:<36} {'(今回未計測)':>10}")
+    return regressions
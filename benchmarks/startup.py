@@ -0,0 +1,118 @@
+import importlib.machinery
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import REPO_ROOT
+
+# 名前 -> (main.py のパス, weather.db を用意した状態で起動するか)
+APPS = {
+    "calculator": (os.path.join("calculator", "main.py"), False),
+    "jma": (os.path.join("jma", "main.py"), False),
+    "jmaDB": (os.path.join("jmaDB", "main.py"), False),
+    "jmaDB.warm": (os.path.join("jmaDB", "main.py"), True),
+}
+# 偽のネットワークの応答時間（最初のフレームがこれを待たないことを確認する）
+DEFAULT_LATENCY = 0.2
+
+# 子プロセスで実行するコード。flet がインストールされていれば本物を使い、Page と requests だけ偽物にする
+CHILD_CODE = """
+import time
+wall0, perf0 = time.time(), time.perf_counter()
+import importlib.util, json, os, sys
+root, relpath, latency, workdir = sys.argv[1], sys.argv[2], float(sys.argv[3]), sys.argv[4]
+sys.path.insert(0, root)
+from benchmarks import fakes
+real_flet = importlib.util.find_spec("flet") is not None
+fakes.install(latency=latency, flet=not real_flet)
+os.chdir(workdir)
+app = fakes.load_app(relpath, "startup_app")
+imported = time.perf_counter()
+page = fakes.Page()
+app.main(page)
+done = time.perf_counter()
+wall = lambda t: wall0 + (t - perf0)
+print(json.dumps({"imported": wall(imported), "first_frame": wall(page.first_add_at or done),
+                  "ready": wall(done), "flet": "real" if real_flet else "fake",
+                  "network_calls": sys.modules["requests"].call_count}))
+"""
+
+
+def flet_mode():
+    # 本物のfletかどうかで起動時間が大きく変わるので結果に記録する。
+    # このプロセスでは偽のfletが sys.modules に入っていることがあるため、sys.path を直接探す
+    return "real" if importlib.machinery.PathFinder.find_spec("flet") is not None else "fake"
+
+
+def run_once(relpath, workdir, latency=DEFAULT_LATENCY):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("APP_TELEMETRY", None)
+    start = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE, REPO_ROOT, relpath, str(latency), workdir],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    times = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "import": times["imported"] - start,
+        "first_frame": times["first_frame"] - start,
+        "ready": times["ready"] - start,
+        "flet": times["flet"],
+        "network_calls": times["network_calls"],
+        "importtime": parse_importtime(proc.stderr),
+    }
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package" の行を (モジュール名, 自身, 累積) にする
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(apps, repeat=15, latency=DEFAULT_LATENCY):
+    # 環境の揺れが1つのアプリに偏らないよう、各アプリを1回ずつ順番に起動する
+    runs = {app: [] for app in apps}
+    with tempfile.TemporaryDirectory() as workdir:
+        for app in apps:
+            relpath, warm = APPS[app]
+            if warm:
+                os.mkdir(os.path.join(workdir, app))
+                run_once(relpath, os.path.join(workdir, app), latency)  # weather.db を作るための1回目は計測しない
+        for i in range(repeat):
+            for app in apps:
+                relpath, warm = APPS[app]
+                if warm:
+                    run_dir = os.path.join(workdir, app)
+                else:
+                    # 毎回空のディレクトリから起動する
+                    run_dir = os.path.join(workdir, f"{app}-{i}")
+                    os.mkdir(run_dir)
+                runs[app].append(run_once(relpath, run_dir, latency))
+    results = {}
+    for app in apps:
+        for metric in ("import", "first_frame", "ready"):
+            values = [r[metric] for r in runs[app]]
+            results[f"startup.{app}.{metric}"] = {
+                "median": statistics.median(values),
+                "min": min(values),
+                "ops_per_sec": 1 / statistics.median(values),
+                "number": 1,
+                "repeat": repeat,
+            }
+    return results, {app: runs[app][-1] for app in apps}
+
+
+def print_top_imports(rows, count=10):
+    # インデントのないものがトップレベルのimport
+    top = sorted((r for r in rows if not r[0].startswith(" ")), key=lambda r: r[2], reverse=True)
+    for name, _, cumulative in top[:count]:
+        print(f"    {cumulative / 1000:8.2f} ms  {name.strip()}")
@@ -1,5 +1,23 @@
 import flet as ft
 import math
+import os
+import sys
+
+# telemetry.py はリポジトリ直下にあるため、ソースから実行したときだけ直下を探索パスに加える。
+# アプリを単体で配布して telemetry.py が無い場合は、何もしない代わりの関数で動かす
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import telemetry
+except ImportError:
+    import contextlib
+    import types
+
+    telemetry = types.SimpleNamespace(
+        incr=lambda name, value=1, **labels: None,
+        span=lambda op: contextlib.nullcontext(),
+        timed=lambda op: (lambda func: func),
+        configure_from_env=lambda: None,
+    )
 
 
 class CalcButton(ft.ElevatedButton):
@@ -134,9 +152,11 @@ class CalculatorApp(ft.Container):
             ]
         )
 
+    @telemetry.timed("calc.button_clicked")
     def button_clicked(self, e):
         data = e.control.data
         print(f"Button clicked with data = {data}")
+        telemetry.incr("calc_buttons_total", button=data)
         if self.result.value == "Error" or data == "AC":
             self.result.value = "0"
             self.reset()
@@ -195,7 +215,8 @@ class CalculatorApp(ft.Container):
         elif data == "π":
             self.result.value = str(math.pi)
 
-        self.update()
+        with telemetry.span("calc.update"):
+            self.update()
 
     def format_number(self, num):
         if num % 1 == 0:
@@ -232,4 +253,6 @@ def main(page: ft.Page):
     page.add(calc)
 
 
-ft.app(target=main)
+if __name__ == "__main__":
+    telemetry.configure_from_env()
+    ft.app(target=main)
@@ -1,41 +1,66 @@
-import flet as ft
-import requests
+import os
+import sys
 
+# telemetry.py はリポジトリ直下にあるため、ソースから実行したときだけ直下を探索パスに加える。
+# アプリを単体で配布して telemetry.py が無い場合は、何もしない代わりの関数で動かす
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import telemetry
+except ImportError:
+    import contextlib
+    import types
+
+    telemetry = types.SimpleNamespace(
+        incr=lambda name, value=1, **labels: None,
+        span=lambda op: contextlib.nullcontext(),
+        timed=lambda op: (lambda func: func),
+        configure_from_env=lambda: None,
+    )
+
+# アイコンはfletの ft.icons の属性名で持ち、カードを作るときに解決する
 WEATHER_CODES = {
-    "100": {"name": "晴れ", "icon": ft.icons.WB_SUNNY},
-    "101": {"name": "晴れ 時々 くもり", "icon": ft.icons.CLOUD_QUEUE},
-    "103": {"name": "晴れ 時々 雨", "icon": ft.icons.UMBRELLA},
-    "105": {"name": "晴れ 時々 雪", "icon": ft.icons.AC_UNIT},
-    "111": {"name": "晴れ のち くもり", "icon": ft.icons.CLOUD_QUEUE},
-    "200": {"name": "くもり", "icon": ft.icons.CLOUD},
-    "201": {"name": "くもり 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "203": {"name": "くもり 時々 雨", "icon": ft.icons.UMBRELLA},
-    "205": {"name": "くもり 時々 雪", "icon": ft.icons.AC_UNIT},
-    "206": {"name": "くもり のち 雨", "icon": ft.icons.UMBRELLA},
-    "260": {"name": "くもり のち 時々 雨", "icon": ft.icons.UMBRELLA},
-    "300": {"name": "雨", "icon": ft.icons.UMBRELLA},
-    "301": {"name": "雨 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "303": {"name": "雨 時々 雪", "icon": ft.icons.AC_UNIT},
-    "306": {"name": "大雨", "icon": ft.icons.WATER_DROP},
-    "400": {"name": "雪", "icon": ft.icons.AC_UNIT},
-    "401": {"name": "雪 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "402": {"name": "雪 時々止む", "icon": ft.icons.STOP},
-    "403": {"name": "雪 時々 雨", "icon": ft.icons.UMBRELLA},
-    "405": {"name": "大雪", "icon": ft.icons.AC_UNIT},
+    "100": {"name": "晴れ", "icon": "WB_SUNNY"},
+    "101": {"name": "晴れ 時々 くもり", "icon": "CLOUD_QUEUE"},
+    "103": {"name": "晴れ 時々 雨", "icon": "UMBRELLA"},
+    "105": {"name": "晴れ 時々 雪", "icon": "AC_UNIT"},
+    "111": {"name": "晴れ のち くもり", "icon": "CLOUD_QUEUE"},
+    "200": {"name": "くもり", "icon": "CLOUD"},
+    "201": {"name": "くもり 時々 晴れ", "icon": "WB_SUNNY"},
+    "203": {"name": "くもり 時々 雨", "icon": "UMBRELLA"},
+    "205": {"name": "くもり 時々 雪", "icon": "AC_UNIT"},
+    "206": {"name": "くもり のち 雨", "icon": "UMBRELLA"},
+    "260": {"name": "くもり のち 時々 雨", "icon": "UMBRELLA"},
+    "300": {"name": "雨", "icon": "UMBRELLA"},
+    "301": {"name": "雨 時々 晴れ", "icon": "WB_SUNNY"},
+    "303": {"name": "雨 時々 雪", "icon": "AC_UNIT"},
+    "306": {"name": "大雨", "icon": "WATER_DROP"},
+    "400": {"name": "雪", "icon": "AC_UNIT"},
+    "401": {"name": "雪 時々 晴れ", "icon": "WB_SUNNY"},
+    "402": {"name": "雪 時々止む", "icon": "STOP"},
+    "403": {"name": "雪 時々 雨", "icon": "UMBRELLA"},
+    "405": {"name": "大雪", "icon": "AC_UNIT"},
 }
 def get_weather_info(code):
-    return WEATHER_CODES.get(code, {"name": "不明", "icon": ft.icons.HELP})
+    return WEATHER_CODES.get(code, {"name": "不明", "icon": "HELP"})
 
+@telemetry.timed("get_region_data")
 def get_region_data():
+    import requests
     URL = "http://www.jma.go.jp/bosai/common/const/area.json"
     try:
-        region_json = requests.get(URL).json()
+        response = requests.get(URL)
+        region_json = response.json()
+        # 1回の取得につき結果を1つだけ数える（本文が読めなかった場合は下の "error"）
+        telemetry.incr("http_responses_total", endpoint="area", status=response.status_code)
         return region_json
     except Exception as e:
+        telemetry.incr("http_responses_total", endpoint="area", status="error")
         print(f"地域データの取得エラー: {e}")
         return None
 
+@telemetry.timed("get_weather_data")
 def get_weather_data(region_code):
+    import requests
     URL = f"https://www.jma.go.jp/bosai/forecast/data/forecast/{region_code}.json"
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -43,20 +68,27 @@ def get_weather_data(region_code):
     try:
         response = requests.get(URL, headers=headers)
         response.raise_for_status()
-        weather_json = requests.get(URL).json()
+        weather_json = response.json()
+        # 1回の取得につき結果を1つだけ数える（HTTPエラーはそのステータス、それ以外の失敗は "error"）
+        telemetry.incr("http_responses_total", endpoint="forecast", status=response.status_code)
         return weather_json
     except requests.exceptions.HTTPError as e:
+        telemetry.incr("http_responses_total", endpoint="forecast", status=e.response.status_code)
         if e.response.status_code == 404:
             print(f"天気データの取得エラー (コード: {region_code}): 404 Not Found")
         else:
             print(f"天気データの取得エラー (コード: {region_code}): {e}")
         return None
     except Exception as e:
+        # 接続エラーや本文の読み込み失敗もメトリクスに残す
+        telemetry.incr("http_responses_total", endpoint="forecast", status="error")
         print(f"その他のエラー (コード: {region_code}): {e}")
         return None
 
 # 天気カードを作成
+@telemetry.timed("create_weather_card")
 def create_weather_card(date, weather_code, max_temp, min_temp):
+    import flet as ft
     weather_info = get_weather_info(weather_code)
     return ft.Card(
         content=ft.Container(
@@ -72,7 +104,7 @@ def create_weather_card(date, weather_code, max_temp, min_temp):
                         content=ft.Row(
                             [
                                 ft.Icon(
-                                    weather_info["icon"],
+                                    getattr(ft.icons, weather_info["icon"]),
                                     size=32,
                                     color="#FF9800"  
                                 ),
@@ -130,16 +162,31 @@ def create_weather_card(date, weather_code, max_temp, min_temp):
         elevation=0,  
     )
 
-def main(page: ft.Page):
+# 週間予報のtimeSeriesから (日付, 天気コード, 最低気温, 最高気温) の一覧を取り出す
+def parse_forecasts(weather_data):
+    forecasts = weather_data[1]["timeSeries"][0]
+    dates = forecasts["timeDefines"]
+    areas = forecasts["areas"]
+
+    area = areas[0]
+
+    temp_data = weather_data[1]["timeSeries"][1]
+    temp_area = temp_data["areas"][0]
+
+    rows = []
+    for i in range(len(dates)):
+        max_temp = temp_area.get("tempsMax", [None])[i] if "tempsMax" in temp_area else None
+        min_temp = temp_area.get("tempsMin", [None])[i] if "tempsMin" in temp_area else None
+        rows.append((dates[i].split("T")[0], area["weatherCodes"][i], min_temp, max_temp))
+    return rows
+
+def main(page: "ft.Page"):
+    import flet as ft
+
     page.title = "天気予報アプリ"
     page.padding = 10
     page.theme_mode = ft.ThemeMode.LIGHT
 
-    region_data = get_region_data()
-    if not region_data:
-        page.add(ft.Text("地域データの取得に失敗しました"))
-        return
-
     # 地域名表示用テキスト
     region_title = ft.Text("", size=20, weight="bold")
 
@@ -150,6 +197,7 @@ def main(page: ft.Page):
         run_spacing=10,
     )
 
+    @telemetry.timed("create_sidebar")
     def create_sidebar():
         sidebar = ft.Column(spacing=10, scroll=ft.ScrollMode.AUTO)
         for region_code, region_info in region_data["centers"].items():
@@ -175,8 +223,10 @@ def main(page: ft.Page):
                 ],
             )
             sidebar.controls.append(region_tile)
+            telemetry.incr("controls_rendered_total", len(region_tile.controls), kind="sidebar_tile")
         return sidebar
 
+    @telemetry.timed("show_weather")
     def show_weather(region_code):
         weather_data = get_weather_data(region_code)
         if not weather_data or len(weather_data) < 2:
@@ -190,34 +240,24 @@ def main(page: ft.Page):
         region_name = region_data["offices"].get(region_code, {}).get("name", "不明")
         region_title.value = region_name
 
-        forecasts = weather_data[1]["timeSeries"][0]
-        dates = forecasts["timeDefines"]
-        areas = forecasts["areas"]
-
-        area = areas[0]
-
-        temp_data = weather_data[1]["timeSeries"][1]
-        temp_area = temp_data["areas"][0]
-
         cards = []
-        for i in range(len(dates)):
-            max_temp = temp_area.get("tempsMax", [None])[i] if "tempsMax" in temp_area else None
-            min_temp = temp_area.get("tempsMin", [None])[i] if "tempsMin" in temp_area else None
-            
+        for date, weather_code, min_temp, max_temp in parse_forecasts(weather_data):
             cards.append(
                 create_weather_card(
-                    date=dates[i].split("T")[0],
-                    weather_code=area["weatherCodes"][i],
+                    date=date,
+                    weather_code=weather_code,
                     max_temp=max_temp,
                     min_temp=min_temp
                 )
             )
 
         weather_grid.controls = cards
-        page.update()
+        telemetry.incr("controls_rendered_total", len(cards), kind="weather_card")
+        with telemetry.span("page.update"):
+            page.update()
 
     sidebar_container = ft.Container(
-        content=create_sidebar(),
+        content=ft.Text("地域データを読み込み中...", color="white"),
         width=250,
         bgcolor="#455A64",
         padding=10,
@@ -234,15 +274,30 @@ def main(page: ft.Page):
         expand=True
     )
 
-    page.add(
-        ft.Row(
-            [
-                sidebar_container,
-                ft.VerticalDivider(width=1),
-                right_area,
-            ],
-            expand=True,
+    with telemetry.span("page.add"):
+        page.add(
+            ft.Row(
+                [
+                    sidebar_container,
+                    ft.VerticalDivider(width=1),
+                    right_area,
+                ],
+                expand=True,
+            )
         )
-    )
 
-ft.app(target=main)
+    # 先に画面を表示してから、地域データを取得してサイドバーを作る
+    with telemetry.span("load_regions"):
+        region_data = get_region_data()
+        if region_data:
+            sidebar_container.content = create_sidebar()
+        else:
+            sidebar_container.content = ft.Text("地域データの取得に失敗しました", color="white")
+        page.update()
+
+
+if __name__ == "__main__":
+    import flet as ft
+
+    telemetry.configure_from_env()
+    ft.app(target=main)
@@ -1,43 +1,69 @@
-import flet as ft
-import requests
 import sqlite3
+import os
+import sys
+from itertools import groupby
+
+# telemetry.py はリポジトリ直下にあるため、ソースから実行したときだけ直下を探索パスに加える。
+# アプリを単体で配布して telemetry.py が無い場合は、何もしない代わりの関数で動かす
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import telemetry
+except ImportError:
+    import contextlib
+    import types
+
+    telemetry = types.SimpleNamespace(
+        incr=lambda name, value=1, **labels: None,
+        span=lambda op: contextlib.nullcontext(),
+        timed=lambda op: (lambda func: func),
+        configure_from_env=lambda: None,
+    )
 
+# アイコンはfletの ft.icons の属性名で持ち、カードを作るときに解決する
 WEATHER_CODES = {
-    "100": {"name": "晴れ", "icon": ft.icons.WB_SUNNY},
-    "101": {"name": "晴れ 時々 くもり", "icon": ft.icons.CLOUD_QUEUE},
-    "103": {"name": "晴れ 時々 雨", "icon": ft.icons.UMBRELLA},
-    "105": {"name": "晴れ 時々 雪", "icon": ft.icons.AC_UNIT},
-    "111": {"name": "晴れ のち くもり", "icon": ft.icons.CLOUD_QUEUE},
-    "200": {"name": "くもり", "icon": ft.icons.CLOUD},
-    "201": {"name": "くもり 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "203": {"name": "くもり 時々 雨", "icon": ft.icons.UMBRELLA},
-    "205": {"name": "くもり 時々 雪", "icon": ft.icons.AC_UNIT},
-    "206": {"name": "くもり のち 雨", "icon": ft.icons.UMBRELLA},
-    "260": {"name": "くもり のち 時々 雨", "icon": ft.icons.UMBRELLA},
-    "300": {"name": "雨", "icon": ft.icons.UMBRELLA},
-    "301": {"name": "雨 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "303": {"name": "雨 時々 雪", "icon": ft.icons.AC_UNIT},
-    "306": {"name": "大雨", "icon": ft.icons.WATER_DROP},
-    "400": {"name": "雪", "icon": ft.icons.AC_UNIT},
-    "401": {"name": "雪 時々 晴れ", "icon": ft.icons.WB_SUNNY},
-    "402": {"name": "雪 時々止む", "icon": ft.icons.STOP},
-    "403": {"name": "雪 時々 雨", "icon": ft.icons.UMBRELLA},
-    "405": {"name": "大雪", "icon": ft.icons.AC_UNIT},
+    "100": {"name": "晴れ", "icon": "WB_SUNNY"},
+    "101": {"name": "晴れ 時々 くもり", "icon": "CLOUD_QUEUE"},
+    "103": {"name": "晴れ 時々 雨", "icon": "UMBRELLA"},
+    "105": {"name": "晴れ 時々 雪", "icon": "AC_UNIT"},
+    "111": {"name": "晴れ のち くもり", "icon": "CLOUD_QUEUE"},
+    "200": {"name": "くもり", "icon": "CLOUD"},
+    "201": {"name": "くもり 時々 晴れ", "icon": "WB_SUNNY"},
+    "203": {"name": "くもり 時々 雨", "icon": "UMBRELLA"},
+    "205": {"name": "くもり 時々 雪", "icon": "AC_UNIT"},
+    "206": {"name": "くもり のち 雨", "icon": "UMBRELLA"},
+    "260": {"name": "くもり のち 時々 雨", "icon": "UMBRELLA"},
+    "300": {"name": "雨", "icon": "UMBRELLA"},
+    "301": {"name": "雨 時々 晴れ", "icon": "WB_SUNNY"},
+    "303": {"name": "雨 時々 雪", "icon": "AC_UNIT"},
+    "306": {"name": "大雨", "icon": "WATER_DROP"},
+    "400": {"name": "雪", "icon": "AC_UNIT"},
+    "401": {"name": "雪 時々 晴れ", "icon": "WB_SUNNY"},
+    "402": {"name": "雪 時々止む", "icon": "STOP"},
+    "403": {"name": "雪 時々 雨", "icon": "UMBRELLA"},
+    "405": {"name": "大雪", "icon": "AC_UNIT"},
 }
 
 def get_weather_info(code):
-    return WEATHER_CODES.get(code, {"name": "不明", "icon": ft.icons.HELP})
+    return WEATHER_CODES.get(code, {"name": "不明", "icon": "HELP"})
 
+@telemetry.timed("get_region_data")
 def get_region_data():
+    import requests
     URL = "http://www.jma.go.jp/bosai/common/const/area.json"
     try:
-        region_json = requests.get(URL).json()
+        response = requests.get(URL)
+        region_json = response.json()
+        # 1回の取得につき結果を1つだけ数える（本文が読めなかった場合は下の "error"）
+        telemetry.incr("http_responses_total", endpoint="area", status=response.status_code)
         return region_json
     except Exception as e:
+        telemetry.incr("http_responses_total", endpoint="area", status="error")
         print(f"地域データの取得エラー: {e}")
         return None
 
+@telemetry.timed("get_weather_data")
 def get_weather_data(region_code):
+    import requests
     URL = f"https://www.jma.go.jp/bosai/forecast/data/forecast/{region_code}.json"
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -45,19 +71,26 @@ def get_weather_data(region_code):
     try:
         response = requests.get(URL, headers=headers)
         response.raise_for_status()
-        weather_json = requests.get(URL).json()
+        weather_json = response.json()
+        # 1回の取得につき結果を1つだけ数える（HTTPエラーはそのステータス、それ以外の失敗は "error"）
+        telemetry.incr("http_responses_total", endpoint="forecast", status=response.status_code)
         return weather_json
     except requests.exceptions.HTTPError as e:
+        telemetry.incr("http_responses_total", endpoint="forecast", status=e.response.status_code)
         if e.response.status_code == 404:
             print(f"天気データの取得エラー (コード: {region_code}): 404 Not Found")
         else:
             print(f"天気データの取得エラー (コード: {region_code}): {e}")
         return None
     except Exception as e:
+        # 接続エラーや本文の読み込み失敗もメトリクスに残す
+        telemetry.incr("http_responses_total", endpoint="forecast", status="error")
         print(f"その他のエラー (コード: {region_code}): {e}")
         return None
         
+@telemetry.timed("create_weather_card")
 def create_weather_card(date, weather_code, max_temp, min_temp):
+    import flet as ft
     weather_info = get_weather_info(weather_code)
     return ft.Card(
         content=ft.Container(
@@ -73,7 +106,7 @@ def create_weather_card(date, weather_code, max_temp, min_temp):
                         content=ft.Row(
                             [
                                 ft.Icon(
-                                    weather_info["icon"],
+                                    getattr(ft.icons, weather_info["icon"]),
                                     size=32,
                                     color="#FF9800"  
                                 ),
@@ -131,6 +164,7 @@ def create_weather_card(date, weather_code, max_temp, min_temp):
         elevation=0,  
     )
 
+@telemetry.timed("db.init")
 def init_db():
     conn = sqlite3.connect("weather.db")
     c = conn.cursor()
@@ -156,9 +190,44 @@ def init_db():
     )
     ''')
 
+    # 地方(center)→府県予報区(office)→一次細分区域(class10)の階層テーブル
+    # 階層が違うと同じコードが使われることがあるため、levelとコードの組を主キーにする
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS areas (
+        level TEXT NOT NULL,
+        area_code TEXT NOT NULL,
+        area_name TEXT,
+        parent_code TEXT,
+        sort_order INTEGER NOT NULL,
+        PRIMARY KEY (level, area_code)
+    )
+    ''')
+    # サイドバーのクエリ用。地方を表示順に読み、その地方の府県予報区を表示順に引くので並べ替えが要らない
+    c.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_areas_order ON areas (level, sort_order, area_code)
+    ''')
+    c.execute('''
+    CREATE INDEX IF NOT EXISTS idx_areas_parent ON areas (level, parent_code, sort_order)
+    ''')
+
     conn.commit()
     conn.close()
 
+def build_area_rows(region_data):
+    # {(level, area_code): (area_name, parent_code, sort_order)} を作る
+    rows = {}
+    for i, (center_code, center_info) in enumerate(region_data["centers"].items()):
+        rows[("center", center_code)] = (center_info.get("name", "不明"), None, i)
+    for level, key in (("office", "offices"), ("class10", "class10s")):
+        parents = region_data["centers"] if level == "office" else region_data["offices"]
+        for area_code, area_info in region_data[key].items():
+            parent_code = area_info.get("parent")
+            siblings = parents.get(parent_code, {}).get("children", [])
+            sort_order = siblings.index(area_code) if area_code in siblings else len(siblings)
+            rows[(level, area_code)] = (area_info.get("name", "不明"), parent_code, sort_order)
+    return rows
+
+@telemetry.timed("db.store_regions")
 def store_region_data_in_db(region_data):
     if not region_data:
         return
@@ -166,22 +235,61 @@ def store_region_data_in_db(region_data):
     conn = sqlite3.connect("weather.db")
     c = conn.cursor()
 
-    for office_code, office_info in region_data["offices"].items():
-        region_code = office_code
-        region_name = office_info.get("name", "不明")
-        c.execute('''
-            INSERT OR IGNORE INTO regions (region_code, region_name)
-            VALUES (?, ?)
-        ''', (region_code, region_name))
+    # 既存の行と比べて、変わった行だけを書き込む
+    rows = build_area_rows(region_data)
+    c.execute('SELECT level, area_code, area_name, parent_code, sort_order FROM areas')
+    existing = {(level, code): (name, parent, order) for level, code, name, parent, order in c.fetchall()}
+    changed = [key + value for key, value in rows.items() if existing.get(key) != value]
+    removed = [key for key in existing if key not in rows]
+    c.executemany('''
+        INSERT OR REPLACE INTO areas (level, area_code, area_name, parent_code, sort_order)
+        VALUES (?, ?, ?, ?, ?)
+    ''', changed)
+    c.executemany('DELETE FROM areas WHERE level = ? AND area_code = ?', removed)
+
+    offices = {code: value[0] for (level, code), value in rows.items() if level == "office"}
+    c.execute('SELECT region_code, region_name FROM regions')
+    existing_regions = dict(c.fetchall())
+    changed_regions = [(code, name) for code, name in offices.items() if existing_regions.get(code) != name]
+    c.executemany('''
+        INSERT OR REPLACE INTO regions (region_code, region_name)
+        VALUES (?, ?)
+    ''', changed_regions)
+    # なくなった府県予報区は、参照している予報ごと削除する
+    removed_regions = [(code,) for code in existing_regions if code not in offices]
+    c.executemany('DELETE FROM forecasts WHERE region_code = ?', removed_regions)
+    c.executemany('DELETE FROM regions WHERE region_code = ?', removed_regions)
     conn.commit()
+    telemetry.incr("db_rows_written_total", len(changed) + len(removed), table="areas")
+    telemetry.incr("db_rows_written_total", len(changed_regions) + len(removed_regions), table="regions")
     conn.close()
 
-def store_weather_data_in_db(region_code, weather_data):
-    if not weather_data or len(weather_data) < 2:
-        return
+@telemetry.timed("db.get_sidebar")
+def get_sidebar_from_db():
+    # サイドバーに必要な地方と府県予報区の組を、表示順に1回のクエリで取得する
+    # CROSS JOIN で結合順を固定し、地方は idx_areas_order、府県予報区は idx_areas_parent の順に読む
     conn = sqlite3.connect("weather.db")
     c = conn.cursor()
+    c.execute('''
+        SELECT center.area_code, center.area_name, office.area_code, office.area_name
+        FROM areas AS center
+        CROSS JOIN areas AS office
+          ON office.level = 'office' AND office.parent_code = center.area_code
+        WHERE center.level = 'center'
+        ORDER BY center.sort_order, center.area_code, office.sort_order
+    ''')
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+# init_db() は main の起動時に1回だけ呼ぶので、ここでは呼ばない
+def refresh_regions():
+    region_data = get_region_data()
+    store_region_data_in_db(region_data)
+    return region_data is not None
 
+# 週間予報のtimeSeriesから (日付, 天気コード, 最低気温, 最高気温) の一覧を取り出す
+def parse_forecasts(weather_data):
     forecasts = weather_data[1]["timeSeries"][0]
     dates = forecasts["timeDefines"]
     areas = forecasts["areas"]
@@ -190,20 +298,33 @@ def store_weather_data_in_db(region_code, weather_data):
     temp_data = weather_data[1]["timeSeries"][1]
     temp_area = temp_data["areas"][0]
 
+    rows = []
     for i in range(len(dates)):
         date = dates[i].split("T")[0]
         weather_code = area["weatherCodes"][i]
         min_temp = temp_area.get("tempsMin", [None])[i] if "tempsMin" in temp_area else None
         max_temp = temp_area.get("tempsMax", [None])[i] if "tempsMax" in temp_area else None
+        rows.append((date, weather_code, min_temp, max_temp))
+    return rows
 
+@telemetry.timed("db.store_weather")
+def store_weather_data_in_db(region_code, weather_data):
+    if not weather_data or len(weather_data) < 2:
+        return
+    conn = sqlite3.connect("weather.db")
+    c = conn.cursor()
+
+    for date, weather_code, min_temp, max_temp in parse_forecasts(weather_data):
         c.execute('''
             INSERT OR REPLACE INTO forecasts (region_code, forecast_date, weather_code, min_temp, max_temp)
             VALUES (?, ?, ?, ?, ?)
         ''', (region_code, date, weather_code, min_temp, max_temp))
 
     conn.commit()
+    telemetry.incr("db_rows_written_total", conn.total_changes, table="forecasts")
     conn.close()
 
+@telemetry.timed("db.get_forecasts")
 def get_forecasts_from_db(region_code):
     conn = sqlite3.connect("weather.db")
     c = conn.cursor()
@@ -218,19 +339,13 @@ def get_forecasts_from_db(region_code):
 
     return region_name, forecasts
 
-def main(page: ft.Page):
+def main(page: "ft.Page", refresh=False):
+    import flet as ft
+
     page.title = "天気予報アプリ"
     page.padding = 10
     page.theme_mode = ft.ThemeMode.LIGHT
 
-    init_db()
-    region_data = get_region_data()
-    store_region_data_in_db(region_data)
-
-    if not region_data:
-        page.add(ft.Text("地域データの取得に失敗しました"))
-        return
-
     region_title = ft.Text("", size=20, weight="bold")
 
     weather_grid = ft.GridView(
@@ -240,16 +355,17 @@ def main(page: ft.Page):
         run_spacing=10,
     )
 
-    def create_sidebar():
+    @telemetry.timed("create_sidebar")
+    def create_sidebar(sidebar_rows):
         sidebar = ft.Column(spacing=10, scroll=ft.ScrollMode.AUTO)
-        for region_code, region_info in region_data["centers"].items():
+        for (center_code, center_name), offices in groupby(sidebar_rows, key=lambda row: row[:2]):
             region_tile = ft.ExpansionTile(
-                title=ft.Text(region_info["name"], color="white"),
+                title=ft.Text(center_name, color="white"),
                 controls=[
                     ft.ListTile(
                         title=ft.Column([
                             ft.Text(
-                                region_data["offices"].get(sub_region, {}).get("name", "不明"),
+                                office_name,
                                 color="white",
                                 size=16
                             ),
@@ -261,14 +377,17 @@ def main(page: ft.Page):
                         ], spacing=2),
                         on_click=lambda e, code=sub_region: show_weather_from_db(code)
                     )
-                    for sub_region in region_info["children"]
+                    for _, _, sub_region, office_name in offices
                 ],
             )
             sidebar.controls.append(region_tile)
+            telemetry.incr("controls_rendered_total", len(region_tile.controls), kind="sidebar_tile")
         return sidebar
 
+    @telemetry.timed("show_weather")
     def show_weather_from_db(region_code):
         region_name, forecasts = get_forecasts_from_db(region_code)
+        telemetry.incr("forecast_cache_total", result="hit" if forecasts else "miss")
         if not forecasts:
             weather_data = get_weather_data(region_code)
             if weather_data:
@@ -295,10 +414,16 @@ def main(page: ft.Page):
             )
 
         weather_grid.controls = cards
-        page.update()
+        telemetry.incr("controls_rendered_total", len(cards), kind="weather_card")
+        with telemetry.span("page.update"):
+            page.update()
+
+    # DBに地域の階層が保存済みなら、ネットワークを使わずにサイドバーを作る
+    init_db()
+    sidebar_rows = get_sidebar_from_db()
 
     sidebar_container = ft.Container(
-        content=create_sidebar(),
+        content=create_sidebar(sidebar_rows) if sidebar_rows else ft.Text("地域データを読み込み中...", color="white"),
         width=250,
         bgcolor="#455A64",
         padding=10,
@@ -314,15 +439,34 @@ def main(page: ft.Page):
         expand=True
     )
 
-    page.add(
-        ft.Row(
-            [
-                sidebar_container,
-                ft.VerticalDivider(width=1),
-                right_area,
-            ],
-            expand=True,
+    with telemetry.span("page.add"):
+        page.add(
+            ft.Row(
+                [
+                    sidebar_container,
+                    ft.VerticalDivider(width=1),
+                    right_area,
+                ],
+                expand=True,
+            )
         )
-    )
 
-ft.app(target=main)
+    if sidebar_rows and not refresh:
+        return
+
+    # DBが空のとき（または --refresh-regions のとき）は、先に画面を表示してから地域データを取得する
+    with telemetry.span("load_regions"):
+        if refresh_regions():
+            sidebar_container.content = create_sidebar(get_sidebar_from_db())
+        elif not sidebar_rows:
+            sidebar_container.content = ft.Text("地域データの取得に失敗しました", color="white")
+        page.update()
+
+
+if __name__ == "__main__":
+    import flet as ft
+
+    telemetry.configure_from_env()
+    # 地域の階層を気象庁から取り直す場合は --refresh-regions を付けて起動する（画面を表示した後に取得する）
+    refresh = "--refresh-regions" in sys.argv
+    ft.app(target=lambda page: main(page, refresh))
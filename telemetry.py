@@ -0,0 +1,243 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# 使い方: 環境変数 APP_TELEMETRY で出力先を指定してアプリを起動する
+#   APP_TELEMETRY=metrics.prom     Prometheusのテキスト形式でファイルに書き出す
+#   APP_TELEMETRY=metrics.ndjson   1行1系列のNDJSONでファイルに書き出す
+#   APP_TELEMETRY=:9464            http://localhost:9464/metrics (と /metrics.ndjson) で公開する
+# ファイルは APP_TELEMETRY_INTERVAL 秒ごと（既定10秒）と終了時に上書きされる。
+# 未指定のときは無効で、span() や incr() はフラグを1回見るだけで何もしない。
+
+# レイテンシ用ヒストグラムのバケット（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DURATION_METRIC = "operation_duration_seconds"
+
+_enabled = False
+_lock = threading.Lock()
+_write_lock = threading.Lock()   # 定期書き出しのスレッドと終了時の書き出しが同じ一時ファイルを使うため
+_counters = {}     # (name, labels) -> 値
+_histograms = {}   # (name, labels) -> {"buckets": [...], "sum": 合計, "count": 件数, "max": 最大}
+_configured = False
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incr(name, value=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0, "max": 0.0}
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                h["buckets"][i] += 1
+                break
+        h["sum"] += value
+        h["count"] += 1
+        if value > h["max"]:
+            h["max"] = value
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("op", "start")
+
+    def __init__(self, op):
+        self.op = op
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(DURATION_METRIC, time.perf_counter() - self.start, op=self.op)
+        if exc_type is not None:
+            incr("operation_errors_total", op=self.op)
+        return False
+
+
+def span(op):
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(op)
+
+
+def timed(op):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(op):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- 出力 ----
+
+def _snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {**h, "buckets": list(h["buckets"])} for key, h in _histograms.items()}
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = []
+    for k, v in items:
+        v = v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    counters, histograms = _snapshot()
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), h in sorted(histograms.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, h["buckets"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(bound))])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {h['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {h['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_ndjson():
+    counters, histograms = _snapshot()
+    now = time.time()
+    lines = []
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(json.dumps({"ts": now, "type": "counter", "name": name, "labels": dict(labels),
+                                 "value": value}, ensure_ascii=False))
+    for (name, labels), h in sorted(histograms.items()):
+        lines.append(json.dumps({"ts": now, "type": "histogram", "name": name, "labels": dict(labels),
+                                 "buckets": dict(zip(map(repr, BUCKETS), h["buckets"])),
+                                 "count": h["count"], "sum": h["sum"], "max": h["max"]},
+                                ensure_ascii=False))
+    return "".join(line + "\n" for line in lines)
+
+
+def write_file(path):
+    text = render_ndjson() if path.endswith(".ndjson") else render_prometheus()
+    tmp = path + ".tmp"
+    with _write_lock:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+def serve(port, host="127.0.0.1"):
+    # 起動時間を増やさないよう、http.server はポート公開を指定したときだけ読み込む
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.ndjson":
+                body, content_type = render_ndjson(), "application/x-ndjson; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _flush_periodically(path, interval):
+    while True:
+        time.sleep(interval)
+        write_file(path)
+
+
+def configure(target, interval=10.0):
+    # target: ファイルパス（.prom / .ndjson）または ":ポート番号"
+    global _configured
+    if not target or _configured:
+        return
+    _configured = True
+    enable()
+    port = target[1:] if target.startswith(":") else target
+    if port.isdigit():
+        serve(int(port))
+        print(f"メトリクスを公開しています: http://127.0.0.1:{port}/metrics")
+        return
+    path = os.path.abspath(target)
+    atexit.register(write_file, path)
+    if interval > 0:
+        threading.Thread(target=_flush_periodically, args=(path, interval), daemon=True).start()
+
+
+def configure_from_env():
+    configure(os.environ.get("APP_TELEMETRY"), float(os.environ.get("APP_TELEMETRY_INTERVAL", "10")))
@@ -0,0 +1,78 @@
+import pandas as pd
+from scipy import stats
+
+
+def build_dataframe(joined_data):
+    df = pd.DataFrame(joined_data, columns=['Airlines', 'Lost_luggage', 'OTP', 'Canceled_flights', 'Total_flights'])
+
+    df['OTP'] = df['OTP'].str.replace('%', '').str.replace(',', '').astype(float)
+    df['Total_flights'] = df['Total_flights'].str.replace(',', '').astype(int)
+    df['Lost_luggage'] = df['Lost_luggage'].astype(int)
+
+    df['Delayed_flights'] = ((100 - df['OTP']) / 100 * df['Total_flights']).round().astype(int)
+
+    df['Lost_luggage_rate'] = (df['Lost_luggage'] / df['Total_flights'] * 1000).round(2)
+    df['Delay_rate'] = (df['Delayed_flights'] / df['Total_flights'] * 1000).round(2)
+    return df
+
+
+def compute_correlations(df):
+    correlation = stats.pearsonr(df['Lost_luggage'], df['Delayed_flights'])
+    normalized_correlation = stats.pearsonr(df['Lost_luggage_rate'], df['Delay_rate'])
+    return (
+        (float(correlation[0]), float(correlation[1])),
+        (float(normalized_correlation[0]), float(normalized_correlation[1])),
+    )
+
+
+def interpret_correlation(coef):
+    if abs(coef) < 0.3:
+        return "弱い"
+    elif abs(coef) < 0.7:
+        return "中程度"
+    else:
+        return "強い"
+
+
+def print_report(df, correlation, normalized_correlation):
+    print("\n=== 絶対数での分析結果 ===")
+    print(f"対象航空会社数: {len(df)}")
+    print(f"相関係数: {correlation[0]:.3f}")
+    print(f"P値: {correlation[1]:.3f}")
+
+    print("\n=== 主要統計（絶対数） ===")
+    print(f"平均ロストバゲージ数: {df['Lost_luggage'].mean():.0f}")
+    print(f"平均遅延便数: {df['Delayed_flights'].mean():.0f}")
+    print(f"\nロストバゲージ最多航空会社: {df.loc[df['Lost_luggage'].idxmax(), 'Airlines']}")
+    print(f"（{df['Lost_luggage'].max()}件）")
+    print(f"\n遅延便数最多航空会社: {df.loc[df['Delayed_flights'].idxmax(), 'Airlines']}")
+    print(f"（{df['Delayed_flights'].max()}便）")
+
+    print("\n=== 正規化データの分析結果 ===")
+    print(f"正規化後の相関係数: {normalized_correlation[0]:.3f}")
+    print(f"P値: {normalized_correlation[1]:.3f}")
+
+    print("\n=== 1000便あたりの統計 ===")
+    print(f"平均ロストバゲージ率: {df['Lost_luggage_rate'].mean():.2f}件/1000便")
+    print(f"平均遅延率: {df['Delay_rate'].mean():.2f}便/1000便")
+    print(f"\nロストバゲージ率最高航空会社: {df.loc[df['Lost_luggage_rate'].idxmax(), 'Airlines']}")
+    print(f"（{df['Lost_luggage_rate'].max():.2f}件/1000便）")
+    print(f"\n遅延率最高航空会社: {df.loc[df['Delay_rate'].idxmax(), 'Airlines']}")
+    print(f"（{df['Delay_rate'].max():.2f}便/1000便）")
+
+    print("\n=== 相関分析の解釈 ===")
+    interpretation = interpret_correlation(correlation[0])
+    normalized_interpretation = interpret_correlation(normalized_correlation[0])
+    print(f"絶対数での相関係数 {correlation[0]:.3f} は{interpretation}相関を示しています。")
+    print(f"正規化後の相関係数 {normalized_correlation[0]:.3f} は{normalized_interpretation}相関を示しています。")
+    if correlation[1] < 0.05 and normalized_correlation[1] < 0.05:
+        print("両方の相関は統計的に有意です。")
+    elif correlation[1] < 0.05:
+        print("絶対数での相関のみ統計的に有意です。")
+    elif normalized_correlation[1] < 0.05:
+        print("正規化後の相関のみ統計的に有意です。")
+    else:
+        print("どちらの相関も統計的に有意ではありません。")
+
+    print("\n=== 分析データ ===")
+    print(df[['Airlines', 'Lost_luggage', 'Lost_luggage_rate', 'Delayed_flights', 'Delay_rate', 'Total_flights', 'OTP']].to_string())
@@ -0,0 +1,119 @@
+import sqlite3
+
+from scraping import clean_airline_name
+
+
+class DBHandler:
+    def __init__(self, db_path="flight_data.db"):
+        self.db_path = db_path
+        self.create_tables()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def create_tables(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS luggagelosers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Airlines TEXT NOT NULL UNIQUE,
+            Lost_luggage INTEGER NOT NULL
+        )
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS oag (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Airlines TEXT NOT NULL UNIQUE,
+            OTP TEXT,
+            Canceled_flights TEXT,
+            Total_flights TEXT
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def insert_luggagelosers(self, data_list):
+        conn = self.connect()
+        cursor = conn.cursor()
+        for data in data_list:
+            try:
+                lost = int(data["Lost_luggage"].replace(',', ''))
+            except ValueError:
+                lost = 0
+            cursor.execute("""
+            INSERT OR IGNORE INTO luggagelosers (Airlines, Lost_luggage)
+            VALUES (?, ?)
+            """, (data["Airlines"], lost))
+        conn.commit()
+        conn.close()
+
+    def insert_oag(self, data_list):
+        conn = self.connect()
+        cursor = conn.cursor()
+        for data in data_list:
+            cursor.execute("""
+            INSERT OR IGNORE INTO oag (Airlines, OTP, Canceled_flights, Total_flights)
+            VALUES (?, ?, ?, ?)
+            """, (data["Airlines"], data["OTP"], data["Canceled_flights"], data["Total_flights"]))
+        conn.commit()
+        conn.close()
+
+    def normalize_airlines(self, table_name):
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, Airlines FROM {table_name}")
+        rows = cursor.fetchall()
+        for row in rows:
+            record_id, airline_name = row
+            normalized_name = clean_airline_name(airline_name)
+            cursor.execute(f"""
+            UPDATE {table_name}
+            SET Airlines = ?
+            WHERE id = ?
+            """, (normalized_name, record_id))
+        conn.commit()
+        conn.close()
+
+    def remove_duplicates(self, table_name):
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        DELETE FROM {table_name}
+        WHERE id NOT IN (
+            SELECT MIN(id)
+            FROM {table_name}
+            GROUP BY Airlines
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def query_joined_data(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+        query = """
+        SELECT DISTINCT l.Airlines,
+                        l.Lost_luggage,
+                        o.OTP,
+                        o.Canceled_flights,
+                        o.Total_flights
+        FROM luggagelosers l
+        JOIN oag o ON l.Airlines = o.Airlines
+        """
+        cursor.execute(query)
+        results = cursor.fetchall()
+        conn.close()
+        return results
+
+    def delete_unmatched_airlines(self, table_name, common_airlines):
+        conn = self.connect()
+        cursor = conn.cursor()
+        common_list = tuple(common_airlines)
+        query = f"""
+        DELETE FROM {table_name}
+        WHERE Airlines NOT IN ({','.join('?' for _ in common_list)})
+        """
+        cursor.execute(query, common_list)
+        conn.commit()
+        conn.close()
@@ -0,0 +1,314 @@
+import argparse
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PARAMS = {
+    "db_path": os.path.join(BASE_DIR, "flight_data.db"),
+    "out_dir": BASE_DIR,
+    "dpi": 300,
+    "headless": True,
+    "n_resamples": 10000,
+    "seed": 0,
+    "processes": 0,
+}
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".pipeline_cache")
+
+# 登録順がそのまま実行順になる（依存先は必ず先に登録する）
+STAGES = {}
+
+
+def stage(name, deps=(), params=(), produces=None, modules=(), spec=None):
+    # produces: paramsを受け取り、そのステージが書き出すファイルの一覧を返す関数
+    # modules: 実際の処理を行うモジュール名。ソースが変わったらキャッシュを無効にする
+    # spec: キーに含める設定（図の仕様など）をJSONにできる形で返す関数
+    def decorator(func):
+        for dep in deps:
+            if dep not in STAGES:
+                raise ValueError(f"ステージ {name} の依存先 {dep} が未登録です")
+        STAGES[name] = {
+            "name": name,
+            "func": func,
+            "deps": tuple(deps),
+            "params": tuple(params),
+            "produces": produces,
+            "modules": tuple(modules),
+            "spec": spec,
+        }
+        return func
+    return decorator
+
+
+# ---- ステージ定義 ----
+
+DB_MODULES = ("db_handler", "scraping")
+# 入力がないためキャッシュキーはソースだけで決まる。取り直すときは --refresh-scrape で両方を強制する
+SCRAPE_STAGES = ("scrape_luggage", "scrape_oag")
+
+
+@stage("scrape_luggage", modules=("scraping",))
+def scrape_luggage_stage(inputs, params):
+    from scraping import scrape_luggagelosers
+    return scrape_luggagelosers()
+
+
+@stage("scrape_oag", params=("headless",), modules=("scraping",))
+def scrape_oag_stage(inputs, params):
+    from scraping import scrape_oag
+    return scrape_oag(headless=params["headless"])
+
+
+@stage("load", deps=("scrape_luggage", "scrape_oag"), params=("db_path",),
+       produces=lambda params: [params["db_path"]], modules=DB_MODULES)
+def load_stage(inputs, params):
+    from db_handler import DBHandler
+    # 前回の実行結果が残らないよう、DBは毎回作り直す
+    if os.path.exists(params["db_path"]):
+        os.remove(params["db_path"])
+    db = DBHandler(params["db_path"])
+    db.insert_luggagelosers(inputs["scrape_luggage"])
+    db.insert_oag(inputs["scrape_oag"])
+    return {"luggagelosers": len(inputs["scrape_luggage"]), "oag": len(inputs["scrape_oag"])}
+
+
+@stage("normalize", deps=("load",), params=("db_path",), modules=DB_MODULES)
+def normalize_stage(inputs, params):
+    from db_handler import DBHandler
+    db = DBHandler(params["db_path"])
+    for table_name in ("luggagelosers", "oag"):
+        db.normalize_airlines(table_name)
+        db.remove_duplicates(table_name)
+    return inputs["load"]
+
+
+@stage("join", deps=("normalize",), params=("db_path",), modules=DB_MODULES)
+def join_stage(inputs, params):
+    from db_handler import DBHandler
+    db = DBHandler(params["db_path"])
+    return sorted(set(row[0] for row in db.query_joined_data()))
+
+
+@stage("prune", deps=("join",), params=("db_path",), modules=DB_MODULES)
+def prune_stage(inputs, params):
+    from db_handler import DBHandler
+    db = DBHandler(params["db_path"])
+    common_airlines = inputs["join"]
+    db.delete_unmatched_airlines("luggagelosers", common_airlines)
+    db.delete_unmatched_airlines("oag", common_airlines)
+    joined_data = db.query_joined_data()
+    print("最終的な一致している航空会社数:", len(joined_data))
+    return joined_data
+
+
+@stage("analyse", deps=("prune",), modules=("analysis",))
+def analyse_stage(inputs, params):
+    from analysis import build_dataframe, compute_correlations, print_report
+    df = build_dataframe(inputs["prune"])
+    correlation, normalized_correlation = compute_correlations(df)
+    print_report(df, correlation, normalized_correlation)
+    return {"df": df, "correlation": correlation, "normalized_correlation": normalized_correlation}
+
+
+# processesは結果に影響しないため、キャッシュのキーには含めない
+@stage("significance", deps=("analyse",), params=("n_resamples", "seed"), modules=("significance",))
+def significance_stage(inputs, params):
+    from significance import analyse_significance, print_significance
+    results = analyse_significance(inputs["analyse"]["df"], n_resamples=params["n_resamples"],
+                                   seed=params["seed"], processes=params["processes"])
+    print_significance(results)
+    return results
+
+
+def _plot_spec():
+    # 実行中に書き換えられた PLOT_SPECS も検出できるよう、ソースとは別に値そのものをキーに含める
+    import render
+    return {"version": render.RENDER_VERSION, "specs": json.dumps(render.PLOT_SPECS, sort_keys=True)}
+
+
+def _plot_outputs(params):
+    from render import PLOT_SPECS
+    return [os.path.join(params["out_dir"], spec["filename"]) for spec in PLOT_SPECS]
+
+
+@stage("plot", deps=("analyse",), params=("out_dir", "dpi"), produces=_plot_outputs,
+       modules=("render",), spec=_plot_spec)
+def plot_stage(inputs, params):
+    import render
+    results = render.render_all(inputs["analyse"]["df"], out_dir=params["out_dir"], dpi=params["dpi"])
+    return [os.path.basename(result["path"]) for result in results]
+
+
+# ---- 実行部 ----
+
+def descendants(*names):
+    result = set(names)
+    for other in STAGES.values():
+        if any(dep in result for dep in other["deps"]):
+            result.add(other["name"])
+    return result
+
+
+def ancestors(name):
+    result = {name}
+    for other in reversed(list(STAGES.values())):
+        if other["name"] in result:
+            result.update(other["deps"])
+    return result
+
+
+def module_digest(name):
+    # importせずにソースファイルを読む（重いライブラリを読み込まないため）
+    found = importlib.util.find_spec(name)
+    with open(found.origin, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def stage_key(info, params, digests):
+    # ステージと処理モジュールのソースコード・設定・使用パラメータ・入力のハッシュが同じなら同じ出力になるとみなす
+    payload = {
+        "name": info["name"],
+        "source": inspect.getsource(info["func"]),
+        "modules": {name: module_digest(name) for name in info["modules"]},
+        "spec": info["spec"]() if info["spec"] else None,
+        "params": {key: params[key] for key in info["params"]},
+        "inputs": {dep: digests[dep] for dep in info["deps"]},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_cache(cache_dir, name):
+    path = os.path.join(cache_dir, f"{name}.pkl")
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # ファイルがない・壊れている・ライブラリの更新で読めない場合はすべて再計算する
+        return None
+
+
+def save_cache(cache_dir, name, key, output):
+    os.makedirs(cache_dir, exist_ok=True)
+    data = pickle.dumps(output)
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(cache_dir, f"{name}.pkl")
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({"key": key, "digest": digest, "output": output}, f)
+    os.replace(path + ".tmp", path)
+    return digest
+
+
+def run_pipeline(params=None, start_from=None, only=None, cache_dir=DEFAULT_CACHE_DIR):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    # start_from はステージ名1つ、または複数のステージ名のリスト
+    if isinstance(start_from, str):
+        start_from = [start_from]
+    for name in list(start_from or []) + [only]:
+        if name is not None and name not in STAGES:
+            raise ValueError(f"不明なステージです: {name}")
+
+    if only is not None:
+        targets = ancestors(only)
+        forced = {only}
+    elif start_from:
+        targets = set(STAGES)
+        forced = descendants(*start_from)
+    else:
+        targets = set(STAGES)
+        forced = set()
+
+    outputs = {}
+    digests = {}
+    executed = set()
+    timings = []
+    total_start = time.perf_counter()
+
+    for name, info in STAGES.items():
+        if name not in targets:
+            continue
+        key = stage_key(info, params, digests)
+        cached = load_cache(cache_dir, name)
+        produced = info["produces"](params) if info["produces"] else []
+
+        # DBを書き換えるステージがあるため、上流が再実行されたら下流も必ず再実行する
+        rerun = (
+            name in forced
+            or any(dep in executed for dep in info["deps"])
+            or cached is None
+            or cached["key"] != key
+            or not all(os.path.exists(path) for path in produced)
+        )
+        if not rerun:
+            outputs[name] = cached["output"]
+            digests[name] = cached["digest"]
+            timings.append((name, "cached", 0.0))
+            print(f"[{name}] キャッシュを使用")
+            continue
+
+        print(f"[{name}] 実行中...")
+        start = time.perf_counter()
+        inputs = {dep: outputs[dep] for dep in info["deps"]}
+        outputs[name] = info["func"](inputs, params)
+        elapsed = time.perf_counter() - start
+        digests[name] = save_cache(cache_dir, name, key, outputs[name])
+        executed.add(name)
+        timings.append((name, "run", elapsed))
+        print(f"[{name}] 完了 ({elapsed:.2f}秒)")
+
+    total = time.perf_counter() - total_start
+    print("\n=== ステージ別実行時間 ===")
+    for name, status, elapsed in timings:
+        label = "実行" if status == "run" else "キャッシュ"
+        print(f"{name:<16} {label:<6} {elapsed:8.2f}秒")
+    print(f"{'合計':<16} {'':<6} {total:8.2f}秒")
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ロストバゲージと遅延便の相関分析パイプライン")
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--from", dest="start_from", nargs="+", choices=list(STAGES), metavar="STAGE",
+                           help="指定したステージ（複数可）とその下流を強制的に再実行する")
+    selection.add_argument("--refresh-scrape", dest="start_from", action="store_const", const=list(SCRAPE_STAGES),
+                           help="両方のサイトからスクレイピングし直し、下流もすべて再実行する")
+    selection.add_argument("--only", choices=list(STAGES),
+                           help="指定したステージだけを強制的に再実行する（上流はキャッシュを使用）")
+    parser.add_argument("--db", default=DEFAULT_PARAMS["db_path"], help="出力するSQLiteファイル")
+    parser.add_argument("--out-dir", default=DEFAULT_PARAMS["out_dir"], help="PNGの出力先")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_PARAMS["dpi"])
+    parser.add_argument("--resamples", type=int, default=DEFAULT_PARAMS["n_resamples"],
+                        help="ブートストラップ・並べ替え検定のリサンプル数")
+    parser.add_argument("--seed", type=int, default=DEFAULT_PARAMS["seed"])
+    parser.add_argument("--processes", type=int, default=DEFAULT_PARAMS["processes"],
+                        help="検定に使うプロセス数（0: CPUコア数, 1: 並列化しない）")
+    parser.add_argument("--show-browser", action="store_true", help="Seleniumをヘッドレスにしない")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--list", action="store_true", help="ステージ一覧を表示して終了する")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, info in STAGES.items():
+            deps = ", ".join(info["deps"]) or "-"
+            print(f"{name:<16} <- {deps}")
+        return 0
+
+    params = {
+        "db_path": os.path.abspath(args.db),
+        "out_dir": os.path.abspath(args.out_dir),
+        "dpi": args.dpi,
+        "headless": not args.show_browser,
+        "n_resamples": args.resamples,
+        "seed": args.seed,
+        "processes": args.processes,
+    }
+    run_pipeline(params, start_from=args.start_from, only=args.only, cache_dir=args.cache_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
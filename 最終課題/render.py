@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 図の仕様やこのモジュールの描画処理を変えたときは値を上げてキャッシュを無効化する
+RENDER_VERSION = 1
+HASH_KEY = "RenderHash"
+
+LABEL_COLUMN = "Airlines"
+
+PLOT_SPECS = [
+    {
+        "filename": "correlation_analysis_linear.png",
+        "x": "Lost_luggage",
+        "y": "Delayed_flights",
+        "title": "Correlation between Lost Luggage and Number of Delayed Flights\n(Linear Scale)",
+        "xlabel": "Number of Lost Luggage",
+        "ylabel": "Number of Delayed Flights",
+        "scale": "linear",
+        "equal_aspect": True,
+    },
+    {
+        "filename": "correlation_analysis_log.png",
+        "x": "Lost_luggage",
+        "y": "Delayed_flights",
+        "title": "Correlation between Lost Luggage and Number of Delayed Flights\n(Log Scale)",
+        "xlabel": "Number of Lost Luggage (log scale)",
+        "ylabel": "Number of Delayed Flights (log scale)",
+        "scale": "log",
+        "equal_aspect": False,
+    },
+    {
+        "filename": "normalized_correlation_analysis.png",
+        "x": "Lost_luggage_rate",
+        "y": "Delay_rate",
+        "title": "Correlation between Lost Luggage Rate and Delay Rate\n(per 1000 flights)",
+        "xlabel": "Lost Luggage per 1000 Flights",
+        "ylabel": "Delayed Flights per 1000 Flights",
+        "scale": "linear",
+        "equal_aspect": False,
+    },
+]
+
+
+def extract_columns(df, spec):
+    # iterrowsを使わず、必要な列だけを配列として取り出す
+    return {
+        "labels": df[LABEL_COLUMN].astype(str).tolist(),
+        "x": df[spec["x"]].to_numpy(dtype=float),
+        "y": df[spec["y"]].to_numpy(dtype=float),
+    }
+
+
+def compute_hash(spec, columns, dpi):
+    h = hashlib.sha256()
+    h.update(json.dumps({"version": RENDER_VERSION, "dpi": dpi, "spec": spec},
+                        sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    h.update("\0".join(columns["labels"]).encode("utf-8"))
+    h.update(np.ascontiguousarray(columns["x"]).tobytes())
+    h.update(np.ascontiguousarray(columns["y"]).tobytes())
+    return h.hexdigest()
+
+
+def read_png_hash(path):
+    # PNGのtEXtチャンクから保存済みのハッシュを読む（画像本体はデコードしない）
+    try:
+        with open(path, "rb") as f:
+            if f.read(8) != b"\x89PNG\r\n\x1a\n":
+                return None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack(">I4s", header)
+                if chunk_type == b"IDAT" or chunk_type == b"IEND":
+                    return None
+                data = f.read(length)
+                f.read(4)  # CRC
+                if chunk_type == b"tEXt":
+                    key, _, value = data.partition(b"\0")
+                    if key == HASH_KEY.encode("latin-1"):
+                        return value.decode("latin-1")
+    except OSError:
+        return None
+
+
+def render_figure(spec, columns, path, dpi, digest):
+    # pyplotを使わずFigureに直接Aggのキャンバスを付けるので、
+    # ノートブックのカーネル内で呼ばれてもバックエンドなどの全体の状態は変わらない
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    start = time.perf_counter()
+    x = columns["x"]
+    y = columns["y"]
+
+    fig = Figure(figsize=(12, 12))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    sns.regplot(x=x, y=y, ax=ax, scatter_kws={"alpha": 0.5})
+
+    if spec["scale"] == "log":
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+    if spec["equal_aspect"]:
+        max_value = max(x.max(), y.max())
+        ax.set_xlim(0, max_value)
+        ax.set_ylim(0, max_value)
+        ax.set_aspect("equal")
+
+    ax.set_title(spec["title"], fontsize=14)
+    ax.set_xlabel(spec["xlabel"], fontsize=12)
+    ax.set_ylabel(spec["ylabel"], fontsize=12)
+
+    bbox = dict(facecolor="white", edgecolor="none", alpha=0.7)
+    for label, xi, yi in zip(columns["labels"], x, y):
+        ax.annotate(label, xy=(xi, yi), xytext=(5, 5), textcoords="offset points",
+                    fontsize=10, bbox=bbox)
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches="tight", metadata={HASH_KEY: digest})
+    return time.perf_counter() - start
+
+
+def render_all(df, specs=PLOT_SPECS, out_dir=".", dpi=300, max_workers=None, force=False):
+    start = time.perf_counter()
+    results = []
+    pending = []
+    for spec in specs:
+        columns = extract_columns(df, spec)
+        digest = compute_hash(spec, columns, dpi)
+        path = os.path.join(out_dir, spec["filename"])
+        result = {"path": path, "rendered": False, "seconds": 0.0}
+        results.append(result)
+        if not force and read_png_hash(path) == digest:
+            print(f"スキップ（変更なし）: {spec['filename']}")
+            continue
+        pending.append((result, (spec, columns, path, dpi, digest)))
+
+    if len(pending) > 1 and max_workers != 1:
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [(result, executor.submit(render_figure, *args)) for result, args in pending]
+            for result, future in futures:
+                result["seconds"] = future.result()
+                result["rendered"] = True
+    else:
+        for result, args in pending:
+            result["seconds"] = render_figure(*args)
+            result["rendered"] = True
+
+    for result in results:
+        if result["rendered"]:
+            print(f"描画: {os.path.basename(result['path'])} ({result['seconds']:.2f}秒)")
+
+    elapsed = time.perf_counter() - start
+    print(f"図の描画 合計時間: {elapsed:.2f}秒 (描画 {len(pending)}件 / 全{len(results)}件)")
+    return results
@@ -0,0 +1,89 @@
+import re
+
+LOST_LUGGAGE_URL = 'https://luggagelosers.com/'
+OAG_URL = "https://www.oag.com/on-time-performance-global?submissionGuid=979215ee-32ea-46d7-8568-dbb97bd87839"
+OAG_IFRAME_SELECTOR = "iframe[src*='https://flo.uri.sh/visualisation/19357084/embed?auto=1']"
+
+emoji_pattern = re.compile("["
+           u"\U0001F1E0-\U0001F1FF"  # 国旗
+           "]+", flags=re.UNICODE)
+
+
+def kokki_kill(text):
+    return emoji_pattern.sub(r'', text)
+
+
+def clean_airline_name(name):
+    name = kokki_kill(name)
+    return name.replace(" ", "").strip().lower()
+
+
+def clean_airline_name_oag(name):
+    return clean_airline_name(name)
+
+
+# luggagelosersから各航空会社のロストバゲージ数を取得
+def scrape_luggagelosers():
+    # DB操作だけを行う場合にスクレイピング用ライブラリを読み込まないよう、ここでimportする
+    import requests
+    from bs4 import BeautifulSoup
+
+    response = requests.get(LOST_LUGGAGE_URL)
+    soup = BeautifulSoup(response.text, "html.parser")
+    table_tags = soup.find('table')
+    tr_tags = table_tags.find_all('tr')
+
+    airlines_lostbags_data = []
+    for tr in tr_tags:
+        td_tags = tr.find_all('td')
+        airline_lost_bags = td_tags[-1].get_text(strip=True)
+        for td in td_tags:
+            airline_tags = td.find_all('a')
+            for airline_tag in airline_tags:
+                airlines = clean_airline_name(airline_tag.get_text(strip=True))
+                airlines_lostbags_data.append({
+                    "Airlines": airlines,
+                    "Lost_luggage": airline_lost_bags
+                })
+    return airlines_lostbags_data
+
+
+# OAGのiframe内から各航空会社のOTP・欠航率・総便数を取得
+def scrape_oag(headless=True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=options)
+    try:
+        driver.get(OAG_URL)
+        iframe = WebDriverWait(driver, 30).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, OAG_IFRAME_SELECTOR))
+        )
+        driver.switch_to.frame(iframe)
+        oag_data = []
+        div_tags = driver.find_elements(By.CSS_SELECTOR, "div.tr.body-row")
+        for div in div_tags:
+            ddiv_tags = div.find_elements(By.CSS_SELECTOR, "div.td")
+            oag_airlines = ddiv_tags[0].text.strip()
+            oag_airlines = clean_airline_name_oag(oag_airlines)
+            otp = ddiv_tags[-3].text.strip()
+            canceled_flights = ddiv_tags[-2].text.strip()
+            total_flights = ddiv_tags[-1].text.strip()
+            oag_data.append({
+                "Airlines": oag_airlines,
+                "OTP": otp,
+                "Canceled_flights": canceled_flights,
+                "Total_flights": total_flights
+            })
+        driver.switch_to.default_content()
+    finally:
+        driver.quit()
+    return oag_data
@@ -0,0 +1,184 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+# 1チャンクあたりの作業配列の上限（これを超えないようにリサンプル数を分割する）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+PAIRS = [
+    ("Lost_luggage", "Delayed_flights", "絶対数"),
+    ("Lost_luggage_rate", "Delay_rate", "1000便あたり"),
+]
+METHODS = ("pearson", "spearman")
+# 1リサンプルあたり同時に確保される (n,) 相当のfloat64配列の数（tracemallocで測った値に1つ余裕を持たせた）
+# ブートストラップのspearmanはrankdataの作業配列が加わるため多い。並べ替え検定は並べ替え行列と yc[perm] だけ
+ARRAYS_PER_RESAMPLE = {
+    ("bootstrap", "pearson"): 7,
+    ("bootstrap", "spearman"): 11,
+    ("permutation", "pearson"): 3,
+    ("permutation", "spearman"): 3,
+}
+# ブートストラップで全リサンプル分を持つ (n_resamples,) のfloat64配列の数
+# （結果を集める配列・プロセスプールから受け取り待ちのチャンク結果・nanpercentileの作業コピー）
+RESULT_ARRAYS = 3
+
+
+def pearson_rows(x, y):
+    # 各行を1つの標本とみなして相関係数をまとめて計算する (x, y: shape (B, n))
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (xc * yc).sum(axis=1) / np.sqrt((xc * xc).sum(axis=1) * (yc * yc).sum(axis=1))
+
+
+def rank_rows(a):
+    return stats.rankdata(a, axis=1)
+
+
+def correlation(x, y, method):
+    x = np.asarray(x, dtype=float)[None, :]
+    y = np.asarray(y, dtype=float)[None, :]
+    if method == "spearman":
+        x, y = rank_rows(x), rank_rows(y)
+    return float(pearson_rows(x, y)[0])
+
+
+def chunk_sizes(n_resamples, n, max_bytes, arrays):
+    per_chunk = max(1, max_bytes // (n * 8 * arrays))
+    sizes = [per_chunk] * (n_resamples // per_chunk)
+    if n_resamples % per_chunk:
+        sizes.append(n_resamples % per_chunk)
+    return sizes
+
+
+def bootstrap_chunk(x, y, method, size, seed):
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(size, len(x)))
+    xs = x[idx]
+    ys = y[idx]
+    if method == "spearman":
+        xs, ys = rank_rows(xs), rank_rows(ys)
+    return pearson_rows(xs, ys)
+
+
+def permutation_chunk(x, y, method, size, seed, observed):
+    # 並べ替えてもyの平均とノルムは変わらないので、中心化は1回だけでよい
+    if method == "spearman":
+        x = stats.rankdata(x)
+        y = stats.rankdata(y)
+    xc = x - x.mean()
+    yc = y - y.mean()
+    denom = np.sqrt((xc * xc).sum() * (yc * yc).sum())
+
+    rng = np.random.default_rng(seed)
+    perm = rng.permuted(np.tile(np.arange(len(y)), (size, 1)), axis=1)
+    r = (yc[perm] @ xc) / denom
+    return int(np.count_nonzero(np.abs(r) >= abs(observed) - 1e-12))
+
+
+def _map_chunks(func, args_list, processes, executor=None):
+    # 結果は順番に1つずつ返す（呼び出し側で受け取ったものから集計する）
+    if executor is not None and len(args_list) > 1:
+        yield from executor.map(func, *zip(*args_list))
+    elif processes and processes > 1 and len(args_list) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            yield from executor.map(func, *zip(*args_list))
+    else:
+        for args in args_list:
+            yield func(*args)
+
+
+def _prepare(x, y, method):
+    if method not in METHODS:
+        raise ValueError(f"不明な相関の種類です: {method}")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.shape != y.shape or x.ndim != 1 or len(x) < 3:
+        raise ValueError("x と y は長さ3以上の同じ長さの1次元配列である必要があります")
+    return x, y
+
+
+def bootstrap_ci(x, y, method="pearson", n_resamples=10000, confidence=0.95, seed=0,
+                 processes=None, max_bytes=DEFAULT_MAX_BYTES, executor=None):
+    x, y = _prepare(x, y, method)
+    # 全リサンプル分の結果も上限に含め、残りをチャンクの作業配列に使う
+    chunk_bytes = max_bytes - n_resamples * 8 * RESULT_ARRAYS
+    if chunk_bytes <= 0:
+        raise ValueError(f"max_bytes が小さすぎます（{n_resamples}回分の結果だけで {n_resamples * 8 * RESULT_ARRAYS} バイト必要です）")
+    sizes = chunk_sizes(n_resamples, len(x), chunk_bytes, ARRAYS_PER_RESAMPLE[("bootstrap", method)])
+    # チャンクごとに乱数系列を分けるので、プロセス数によらず結果は同じになる
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    samples = np.empty(n_resamples)
+    start = 0
+    for chunk in _map_chunks(bootstrap_chunk, [(x, y, method, size, s) for size, s in zip(sizes, seeds)],
+                             processes, executor):
+        samples[start:start + len(chunk)] = chunk
+        start += len(chunk)
+
+    alpha = (1 - confidence) / 2
+    low, high = np.nanpercentile(samples, [100 * alpha, 100 * (1 - alpha)])
+    return {
+        "statistic": correlation(x, y, method),
+        "low": float(low),
+        "high": float(high),
+        "confidence": confidence,
+        "n_resamples": n_resamples,
+    }
+
+
+def permutation_test(x, y, method="pearson", n_resamples=10000, seed=0,
+                     processes=None, max_bytes=DEFAULT_MAX_BYTES, executor=None):
+    x, y = _prepare(x, y, method)
+    observed = correlation(x, y, method)
+    sizes = chunk_sizes(n_resamples, len(x), max_bytes, ARRAYS_PER_RESAMPLE[("permutation", method)])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    counts = _map_chunks(permutation_chunk,
+                         [(x, y, method, size, s, observed) for size, s in zip(sizes, seeds)], processes, executor)
+    # 両側検定。観測値自身も1回分として数える
+    return {
+        "statistic": observed,
+        "pvalue": (sum(counts) + 1) / (n_resamples + 1),
+        "n_resamples": n_resamples,
+    }
+
+
+def analyse_significance(df, n_resamples=10000, confidence=0.95, seed=0, processes=None):
+    if processes == 0:
+        processes = os.cpu_count()
+    # 8回の検定でプロセスプールを1つだけ作って使い回す
+    executor = ProcessPoolExecutor(max_workers=processes) if processes and processes > 1 else None
+    try:
+        results = []
+        for x_col, y_col, label in PAIRS:
+            for method in METHODS:
+                ci = bootstrap_ci(df[x_col], df[y_col], method, n_resamples, confidence, seed,
+                                  executor=executor)
+                perm = permutation_test(df[x_col], df[y_col], method, n_resamples, seed, executor=executor)
+                results.append({
+                    "label": label,
+                    "x": x_col,
+                    "y": y_col,
+                    "method": method,
+                    "statistic": ci["statistic"],
+                    "low": ci["low"],
+                    "high": ci["high"],
+                    "confidence": confidence,
+                    "pvalue": perm["pvalue"],
+                    "n_resamples": n_resamples,
+                })
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
+
+
+def print_significance(results):
+    print("\n=== ブートストラップ信頼区間・並べ替え検定 ===")
+    for r in results:
+        print(
+            f"{r['label']:<8} {r['method']:<8} r = {r['statistic']:.3f}  "
+            f"{r['confidence'] * 100:.0f}%CI [{r['low']:.3f}, {r['high']:.3f}]  "
+            f"p = {r['pvalue']:.4f}  (リサンプル {r['n_resamples']}回)"
+        )